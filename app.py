@@ -1,7 +1,10 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import JSONResponse
-from modern_resume_parser import ModernResumeParser
-import tempfile
+from fastapi.concurrency import run_in_threadpool
+from modern_resume_parser import ModernResumeParser, DocumentLimitError, cascade_stats
+from worker_pool import WorkerPool
+from artifact_store import ArtifactStore
+from upload_stream import read_pdf_upload
 import os
 from pathlib import Path
 from typing import Dict, Any
@@ -24,6 +27,79 @@ app = FastAPI(
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 ALLOWED_CONTENT_TYPES = ["application/pdf"]
 
+# Uploads are streamed from the request body, so describe the form for /docs by hand
+UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}}
+                }
+            }
+        }
+    }
+}
+
+# Worker mode: parse in recycled worker processes instead of the server process
+PARSER_WORKERS = int(os.environ.get("PARSER_WORKERS", "0"))
+WORKER_MAX_DOCUMENTS = int(os.environ.get("WORKER_MAX_DOCUMENTS", "500"))
+WORKER_MAX_RSS_MB = int(os.environ.get("WORKER_MAX_RSS_MB", "1024"))
+MAX_PAGES = int(os.environ.get("MAX_PAGES", "20"))
+MAX_CHARS = int(os.environ.get("MAX_CHARS", "200000"))
+MAX_PARSE_SECONDS = int(os.environ.get("MAX_PARSE_SECONDS", "60"))
+
+# Read PDFs from word boxes so two-column resumes come out in reading order
+LAYOUT_MODE = os.environ.get("LAYOUT_MODE", "false").lower() in ("1", "true", "yes")
+
+# Cache parse intermediates so extractor changes can be backfilled cheaply
+ARTIFACT_DIR = os.environ.get("ARTIFACT_DIR")
+
+worker_pool = None
+artifact_store = ArtifactStore(ARTIFACT_DIR) if ARTIFACT_DIR else None
+
+
+@app.on_event("startup")
+async def start_worker_pool():
+    """Start parser worker processes when worker mode is enabled"""
+    global worker_pool
+    if PARSER_WORKERS > 0:
+        worker_pool = WorkerPool(
+            workers=PARSER_WORKERS,
+            max_documents=WORKER_MAX_DOCUMENTS,
+            max_rss_mb=WORKER_MAX_RSS_MB,
+            max_pages=MAX_PAGES,
+            max_chars=MAX_CHARS,
+            max_seconds=MAX_PARSE_SECONDS,
+            artifact_dir=ARTIFACT_DIR
+        )
+        logger.info(f"Started {PARSER_WORKERS} parser worker(s)")
+
+
+@app.on_event("shutdown")
+async def stop_worker_pool():
+    """Stop parser worker processes"""
+    if worker_pool:
+        worker_pool.close()
+
+
+async def parse_pdf(pdf_file) -> Dict[str, Any]:
+    """
+    Parse a PDF path or in-memory buffer in a worker process if worker mode is on, otherwise in-process
+
+    Returns:
+        Dict with the extracted "data" and the ranked "candidates" per field
+    """
+    if worker_pool:
+        result = await run_in_threadpool(worker_pool.parse, pdf_file, LAYOUT_MODE)
+        return {"data": result["data"], "candidates": result["candidates"]}
+    parser = ModernResumeParser(pdf_file, layout=LAYOUT_MODE, max_pages=MAX_PAGES, max_chars=MAX_CHARS,
+                                artifact_store=artifact_store)
+    data = parser.get_extracted_data()
+    return {"data": data, "candidates": parser.candidates}
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -33,7 +109,8 @@ async def root():
         "docs": "/docs",
         "endpoints": {
             "upload_resume": "/upload-resume",
-            "health": "/health"
+            "health": "/health",
+            "stats": "/stats"
         }
     }
 
@@ -42,13 +119,20 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "resume-parser"}
 
-@app.post("/upload-resume")
-async def upload_resume(file: UploadFile = File(...)) -> Dict[str, Any]:
+@app.get("/stats")
+async def worker_stats():
+    """Parser statistics: extraction cascade stages run and, in worker mode, worker pool counters"""
+    if not worker_pool:
+        return {"worker_mode": False, "cascade": cascade_stats()}
+    return {"worker_mode": True, **worker_pool.stats(), "cascade": cascade_stats()}
+
+@app.post("/upload-resume", openapi_extra=UPLOAD_OPENAPI)
+async def upload_resume(request: Request) -> Dict[str, Any]:
     """
     Upload a PDF resume and extract key information
     
     Args:
-        file: PDF file to be parsed
+        request: multipart/form-data request with the PDF in the "file" field
         
     Returns:
         JSON response with extracted resume information
@@ -57,112 +141,67 @@ async def upload_resume(file: UploadFile = File(...)) -> Dict[str, Any]:
         HTTPException: If file is invalid or processing fails
     """
     
-    # Validate file type
-    if file.content_type not in ALLOWED_CONTENT_TYPES:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type. Only PDF files are allowed. Got: {file.content_type}"
-        )
-    
-    # Check file size
-    file_content = await file.read()
-    if len(file_content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File size too large. Maximum allowed size is {MAX_FILE_SIZE // (1024*1024)}MB"
-        )
+    # Stream the upload into memory, validating type, magic bytes and size as it arrives
+    upload = await read_pdf_upload(request, MAX_FILE_SIZE, ALLOWED_CONTENT_TYPES)
     
-    # Reset file pointer
-    await file.seek(0)
-    
-    # Create temporary file to store the uploaded PDF
-    temp_file = None
     try:
-        # Create temporary file with PDF extension
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            temp_file.write(file_content)
-            temp_file_path = temp_file.name
-        
-        logger.info(f"Processing uploaded file: {file.filename}")
+        logger.info(f"Processing uploaded file: {upload.filename}")
         
         # Parse the resume using our ModernResumeParser
-        parser = ModernResumeParser(temp_file_path)
-        extracted_data = parser.get_extracted_data()
+        parsed = await parse_pdf(upload.buffer)
+        extracted_data = parsed["data"]
         
         # Add metadata about the file
         result = {
             "success": True,
-            "filename": file.filename,
-            "file_size_bytes": len(file_content),
+            "filename": upload.filename,
+            "file_size_bytes": upload.size,
             "extracted_data": extracted_data,
             "metadata": {
                 "parser_version": "2.0",
-                "processing_status": "completed"
+                "processing_status": "completed",
+                "candidates": parsed["candidates"]
             }
         }
         
-        logger.info(f"Successfully processed file: {file.filename}")
+        logger.info(f"Successfully processed file: {upload.filename}")
         return JSONResponse(content=result)
         
+    except DocumentLimitError as e:
+        logger.warning(f"Rejected file {upload.filename}: {str(e)}")
+        raise HTTPException(status_code=413, detail=str(e))
+
     except Exception as e:
-        logger.error(f"Error processing file {file.filename}: {str(e)}")
+        logger.error(f"Error processing file {upload.filename}: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Error processing resume: {str(e)}"
         )
-    
-    finally:
-        # Clean up temporary file
-        if temp_file and os.path.exists(temp_file_path):
-            try:
-                os.unlink(temp_file_path)
-                logger.info(f"Cleaned up temporary file: {temp_file_path}")
-            except Exception as e:
-                logger.warning(f"Could not delete temporary file: {e}")
-
-@app.post("/parse-resume")
-async def parse_resume_detailed(file: UploadFile = File(...)) -> Dict[str, Any]:
+
+@app.post("/parse-resume", openapi_extra=UPLOAD_OPENAPI)
+async def parse_resume_detailed(request: Request) -> Dict[str, Any]:
     """
     Alternative endpoint with more detailed response format
     
     Args:
-        file: PDF file to be parsed
+        request: multipart/form-data request with the PDF in the "file" field
         
     Returns:
         Detailed JSON response with categorized information
     """
     
-    # Validate file
-    if file.content_type not in ALLOWED_CONTENT_TYPES:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type. Only PDF files are allowed. Got: {file.content_type}"
-        )
-    
-    file_content = await file.read()
-    if len(file_content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File size too large. Maximum allowed size is {MAX_FILE_SIZE // (1024*1024)}MB"
-        )
+    upload = await read_pdf_upload(request, MAX_FILE_SIZE, ALLOWED_CONTENT_TYPES)
     
-    await file.seek(0)
-    
-    temp_file = None
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            temp_file.write(file_content)
-            temp_file_path = temp_file.name
-        
-        parser = ModernResumeParser(temp_file_path)
-        raw_data = parser.get_extracted_data()
+        parsed = await parse_pdf(upload.buffer)
+        raw_data = parsed["data"]
         
         # Organize data into categories
         result = {
             "success": True,
             "file_info": {
-                "filename": file.filename,
-                "size_bytes": len(file_content),
+                "filename": upload.filename,
+                "size_bytes": upload.size,
                 "pages": raw_data.get("no_of_pages")
             },
             "personal_info": {
@@ -180,24 +219,22 @@ async def parse_resume_detailed(file: UploadFile = File(...)) -> Dict[str, Any]:
                 "total_experience": raw_data.get("total_experience"),
                 "skills": raw_data.get("skills", [])
             },
-            "raw_extracted_data": raw_data
+            "raw_extracted_data": raw_data,
+            "candidates": parsed["candidates"]
         }
         
         return JSONResponse(content=result)
         
+    except DocumentLimitError as e:
+        logger.warning(f"Rejected file {upload.filename}: {str(e)}")
+        raise HTTPException(status_code=413, detail=str(e))
+
     except Exception as e:
-        logger.error(f"Error processing file {file.filename}: {str(e)}")
+        logger.error(f"Error processing file {upload.filename}: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Error processing resume: {str(e)}"
         )
-    
-    finally:
-        if temp_file and os.path.exists(temp_file_path):
-            try:
-                os.unlink(temp_file_path)
-            except Exception as e:
-                logger.warning(f"Could not delete temporary file: {e}")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import sys
+import logging
+import tempfile
+from pathlib import Path
+
+import spacy
+from spacy.tokens import DocBin
+
+from modern_resume_parser import (
+    ModernResumeParser, insert_into_db, pipeline_id, TEXT_EXTRACTION_VERSION,
+    LAYOUT_EXTRACTION_VERSION
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactStore:
+    """On-disk cache of per-document parse intermediates.
+
+    Each document gets a directory named after the SHA-256 of its bytes
+    plus the extraction mode and version, holding the extracted text, the spaCy Doc
+    as a ``DocBin``, the layout word index and a ``meta.json`` with the
+    page count, extracted data and the extractor versions that produced
+    it. The Doc is only saved when a parse needed spaCy. A backfill then
+    only re-runs extractors whose version changed, without pdfplumber, and
+    upserts the refreshed row in MySQL; spaCy only runs for records cached
+    without a Doc whose re-run extractors need it, and the Doc is saved then.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def document_key(pdf_file, layout=False):
+        """Content hash of the PDF, so renamed or re-uploaded files still hit the cache.
+
+        The extraction version is part of the key, so text cached by older
+        extraction code is never reused.
+        """
+        digest = hashlib.sha256()
+        if hasattr(pdf_file, 'getbuffer'):
+            with pdf_file.getbuffer() as view:
+                digest.update(view)
+        else:
+            with open(pdf_file, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        mode, version = ('layout', LAYOUT_EXTRACTION_VERSION) if layout else ('text', TEXT_EXTRACTION_VERSION)
+        return f"{digest.hexdigest()}-{mode}-v{version}"
+
+    @staticmethod
+    def extraction_version(layout):
+        return LAYOUT_EXTRACTION_VERSION if layout else TEXT_EXTRACTION_VERSION
+
+    def keys(self):
+        """Keys of all complete records in the store"""
+        return sorted(p.parent.name for p in self.directory.glob('*/meta.json'))
+
+    def load_meta(self, key):
+        """Load only a record's meta.json, or None if it doesn't exist"""
+        meta_path = self.directory / key / 'meta.json'
+        if not meta_path.exists():
+            return None
+        with open(meta_path, encoding='utf-8') as f:
+            record = json.load(f)
+        record['key'] = key
+        return record
+
+    def load(self, key, nlp, record=None):
+        """Load a cached record with its text, words and Doc, or None if it doesn't exist.
+
+        The Doc is left out if a different spaCy pipeline than ``nlp`` made it.
+        """
+        record_dir = self.directory / key
+        if record is None:
+            record = self.load_meta(key)
+        if record is None:
+            return None
+        record['text'] = (record_dir / 'text.txt').read_text(encoding='utf-8')
+
+        words_path = record_dir / 'words.json'
+        if words_path.exists():
+            with open(words_path, encoding='utf-8') as f:
+                record['words'] = json.load(f)
+        else:
+            record['words'] = []
+
+        record['doc'] = None
+        doc_path = record_dir / 'doc.spacy'
+        if doc_path.exists() and record.get('pipeline') == pipeline_id(nlp):
+            doc_bin = DocBin().from_bytes(doc_path.read_bytes())
+            record['doc'] = next(doc_bin.get_docs(nlp.vocab), None)
+        return record
+
+    def load_for(self, pdf_path, layout, nlp):
+        """Return (key, record) for a PDF; record is None on a cache miss"""
+        key = self.document_key(pdf_path, layout)
+        return key, self.load(key, nlp)
+
+    def save(self, parser, data):
+        """Save a parser's intermediates and extracted data under its key"""
+        record_dir = self.directory / parser.artifact_key
+        record_dir.mkdir(parents=True, exist_ok=True)
+
+        self._write_atomic(record_dir / 'text.txt', parser.text.encode('utf-8'))
+        if parser.words:
+            self._write_atomic(record_dir / 'words.json', json.dumps(parser.words).encode('utf-8'))
+        # Persist the Doc whenever spaCy ran, unless it came from this record already
+        cached_doc = (parser.record or {}).get('doc')
+        if parser._doc is not None and parser._doc is not cached_doc:
+            doc_bin = DocBin(store_user_data=False)
+            doc_bin.add(parser._doc)
+            self._write_atomic(record_dir / 'doc.spacy', doc_bin.to_bytes())
+
+        meta = {
+            # In-memory uploads are recorded by their filename
+            'source': str(getattr(parser.pdf_path, 'name', None) or parser.pdf_path),
+            'layout': parser.layout,
+            'extraction_version': self.extraction_version(parser.layout),
+            'page_count': parser.page_count,
+            'versions': dict(parser.EXTRACTOR_VERSIONS),
+            # Pipeline that made the cached Doc; a Doc from another one is ignored
+            'pipeline': pipeline_id(parser.nlp) if parser._doc is not None else None,
+            'data': data,
+            'candidates': parser.candidates,
+            # Stages run per field by whichever parse last extracted it
+            'tiers': {**(parser.record or {}).get('tiers', {}), **parser.tiers}
+        }
+        # meta.json is written last, so a record only counts once complete
+        self._write_atomic(record_dir / 'meta.json', json.dumps(meta, indent=2).encode('utf-8'))
+
+    @staticmethod
+    def _write_atomic(path, content):
+        """Write bytes to a unique temporary file and move it into place.
+
+        Workers can save the same document at once, so each writer needs
+        its own temporary file, and readers never see a half-written one.
+        """
+        tmp = tempfile.NamedTemporaryFile(dir=path.parent, prefix=f'.{path.name}.', delete=False)
+        try:
+            with tmp:
+                tmp.write(content)
+            os.replace(tmp.name, path)
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+
+    def backfill(self, nlp=None, update_db=True):
+        """Re-run outdated extractors on every cached record.
+
+        Versions are checked from meta.json first; text, words and the Doc
+        are only loaded for records that need re-extraction. Records cached
+        by an older text/layout extraction are skipped, since refreshing
+        them needs the PDF.
+
+        Args:
+            nlp: Loaded spaCy pipeline (en_core_web_sm is loaded if None)
+            update_db: Upsert each refreshed record's MySQL row
+
+        Returns:
+            Dict with the number of documents seen, updated and skipped,
+            and how often each extractor was re-run
+        """
+        if nlp is None:
+            nlp = spacy.load('en_core_web_sm')
+
+        stats = {'documents': 0, 'updated': 0, 'outdated_extraction': 0, 'extractors_run': {}}
+        for key in self.keys():
+            meta = self.load_meta(key)
+            stats['documents'] += 1
+            if meta.get('extraction_version') != self.extraction_version(meta['layout']):
+                stats['outdated_extraction'] += 1
+                logger.warning(f"Skipping {meta['source']}: cached with an older extraction, re-parse the PDF")
+                continue
+            fields = ModernResumeParser.stale_fields_for(meta, pipeline_id(nlp))
+            if not fields:
+                continue
+
+            record = self.load(key, nlp, record=meta)
+            parser = ModernResumeParser.from_record(record, self, nlp=nlp)
+            data = parser.extract_fields(fields)
+            if update_db:
+                insert_into_db(data, key)
+            stats['updated'] += 1
+            for field in fields:
+                stats['extractors_run'][field] = stats['extractors_run'].get(field, 0) + 1
+            logger.info(f"Re-extracted {', '.join(fields)} for {record['source']}")
+        return stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = [arg for arg in sys.argv[1:] if arg != '--no-db']
+    if len(args) != 1:
+        print("Usage: python artifact_store.py <artifact_dir> [--no-db]")
+        sys.exit(1)
+    stats = ArtifactStore(args[0]).backfill(update_db='--no-db' not in sys.argv)
+    print(json.dumps(stats, indent=2))
@@ -1,10 +1,15 @@
 import spacy
 import re
+import threading
 import pdfplumber
 from pathlib import Path
 
-def insert_into_db(data):
-    """Insert parsed resume data into MySQL database"""
+def insert_into_db(data, artifact_key=None):
+    """Insert parsed resume data into MySQL database.
+
+    With an artifact_key the row is upserted on it, so re-parsing or
+    backfilling a cached document updates its row instead of adding one.
+    """
     import mysql.connector
     from mysql.connector import Error
     
@@ -29,13 +34,10 @@ def insert_into_db(data):
             
         cursor = connection.cursor()
         
-        # SQL query to insert data
-        query = """
-        INSERT INTO resume (
-            name, email, mobile_num, skills, cllg_name, degree, 
-            designation, company_names, no_of_pgs, total_experience
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
+        columns = [
+            'name', 'email', 'mobile_num', 'skills', 'cllg_name', 'degree',
+            'designation', 'company_names', 'no_of_pgs', 'total_experience'
+        ]
         
         # Data preparation with explicit type handling
         skills_str = ', '.join(str(skill) for skill in data.get('skills', []) if skill)
@@ -43,19 +45,32 @@ def insert_into_db(data):
         company_name = str(company_names[0]) if company_names else None
         
         # Convert potential None values to empty strings for text fields
+        # (in the same order as columns)
         values = [
             str(data.get('name', '')) if data.get('name') else '',
             str(data.get('email', '')) if data.get('email') else '',
             str(data.get('mobile_number', '')) if data.get('mobile_number') else '',
+            skills_str,
             str(data.get('college_name', '')) if data.get('college_name') else '',
             str(data.get('degree', '')) if data.get('degree') else '',
             str(data.get('designation', '')) if data.get('designation') else '',
             str(company_name) if company_name else '',
-            skills_str,
             int(data.get('no_of_pages', 0)) if data.get('no_of_pages') else 0,
             str(data.get('total_experience', '')) if data.get('total_experience') else ''
         ]
         
+        # SQL query to insert data
+        updates = ', '.join(f"{column} = VALUES({column})" for column in columns)
+        if artifact_key:
+            columns.append('artifact_key')
+            values.append(artifact_key)
+        query = f"""
+        INSERT INTO resume ({', '.join(columns)})
+        VALUES ({', '.join(['%s'] * len(columns))})
+        """
+        if artifact_key:
+            query += f"ON DUPLICATE KEY UPDATE {updates}"
+        
         # Execute and commit
         cursor.execute(query, values)
         connection.commit()
@@ -82,86 +97,541 @@ def insert_into_db(data):
             connection.close()
             print("Database connection closed")
 
+# Layout mode tuning (all distances in PDF points)
+LINE_TOLERANCE = 3          # words whose tops differ by less than this share a line
+MIN_GUTTER_WIDTH = 12       # narrowest vertical gap treated as a column gutter
+GUTTER_MAX_COVERAGE = 0.1   # fraction of lines allowed to cross a gutter (headers etc.)
+BLOCK_GAP_FACTOR = 1.5      # line gap, relative to line height, that starts a new block
+FONT_SIZE_TOLERANCE = 0.5   # words within this of the largest size count as "largest"
+
+# Bump when text or layout extraction changes (including the constants
+# above) so text cached by the old code isn't reused
+TEXT_EXTRACTION_VERSION = 1
+LAYOUT_EXTRACTION_VERSION = 1
+
+# Extraction cascade: cheap regex/lookup candidates first, layout and NER
+# only when the best candidate so far scores below this
+CONFIDENCE_THRESHOLD = 0.8
+AGREEMENT_BONUS = 0.05      # added when several stages produce the same value
+MIN_CONFIDENCE = 0.5        # candidates below this are kept as candidates only, never as values
+# Run NER for company names even when a suffix pattern already found a
+# confident one. Off by default: finds companies named without a suffix,
+# but then every document pays for spaCy
+COMPANY_NER_ALWAYS = False
+
+# Job titles within this many characters after an experience heading score higher
+DESIGNATION_HEADING_DISTANCE = 300
+
+# Words that mark a line as a heading, institution or job title rather than a name
+NON_NAME_WORDS = {
+    'resume', 'curriculum', 'vitae', 'cv', 'profile', 'summary', 'objective',
+    'education', 'experience', 'skills', 'projects', 'contact', 'certifications',
+    'university', 'college', 'institute', 'school', 'institution',
+    'engineer', 'developer', 'manager', 'analyst', 'scientist', 'consultant'
+}
+
+# Common false positives for company names
+COMPANY_FALSE_POSITIVES = [
+    'university', 'college', 'school', 'institute', 'institution',
+    'bachelor of technology', 'master of science', 'phd', 'degree',
+    'certification', 'certifications', 'version control', 'cicd',
+    'iac', 'rbac', 'api management', 'cloud security', 'hands'
+]
+
+# Organisation names ending in a legal or industry suffix
+# (single line only, so a heading above it isn't swallowed)
+COMPANY_PATTERN = (
+    r'\b((?:[A-Z][\w&.-]*[ \t]+){0,4}[A-Z][\w&.-]*[ \t]+'
+    r'(Pvt\.?[ \t]+Ltd\.?|Private[ \t]+Limited|Limited|Ltd\.?|Inc\.?|LLC|LLP|'
+    r'Corporation|Corp\.?|Technologies|Solutions|Consultancy[ \t]+Services|Systems))'
+)
+# Suffixes that also end skill names ("Operating Systems", "Cloud Solutions"),
+# so a match on them alone isn't enough to report a company
+GENERIC_COMPANY_SUFFIXES = {'technologies', 'solutions', 'systems'}
+# Job title words that can precede a company name on the same line
+COMPANY_TITLE_WORDS = {
+    'senior', 'junior', 'lead', 'principal', 'staff', 'chief', 'head', 'associate',
+    'assistant', 'intern', 'trainee', 'software', 'engineer', 'developer', 'manager',
+    'analyst', 'scientist', 'consultant', 'architect', 'designer', 'administrator'
+}
+
+_cascade_counts = {}
+_cascade_lock = threading.Lock()
+
+
+def _candidate(value, score, source):
+    """A scored extraction candidate with where it came from"""
+    return {"value": value, "score": round(min(score, 1.0), 2), "source": source}
+
+
+def _rank_candidates(candidates):
+    """Merge duplicate values and sort by score, keeping first-seen order on ties.
+
+    Sources are "stage:method" strings. A value found by more than one
+    stage keeps its best score plus a small bonus; every source that
+    produced it is listed.
+    """
+    merged = {}
+    for cand in candidates:
+        key = str(cand['value']).strip().lower()
+        if key not in merged:
+            merged[key] = dict(cand)
+            continue
+        best = merged[key]
+        sources = best['source'].split('+')
+        stages = {source.split(':')[0] for source in sources}
+        score = max(best['score'], cand['score'])
+        if cand['source'].split(':')[0] not in stages:
+            score += AGREEMENT_BONUS
+        if cand['source'] not in sources:
+            best['source'] = '+'.join(sources + [cand['source']])
+        best['score'] = round(min(score, 1.0), 2)
+    return sorted(merged.values(), key=lambda c: -c['score'])
+
+
+def pipeline_id(nlp):
+    """Name and version of a spaCy pipeline, to tell which one made a cached Doc"""
+    return f"{nlp.meta.get('lang')}_{nlp.meta.get('name')}-{nlp.meta.get('version')}"
+
+
+def record_cascade_tiers(tiers):
+    """Add one document's cascade stages (field -> stages run) to the process totals"""
+    with _cascade_lock:
+        for field, fired in tiers.items():
+            counts = _cascade_counts.setdefault(field, {})
+            for tier in fired:
+                counts[tier] = counts.get(tier, 0) + 1
+
+
+def cascade_stats():
+    """How often each cascade stage ran, per field"""
+    with _cascade_lock:
+        return {field: dict(counts) for field, counts in _cascade_counts.items()}
+
+
+def _group_lines(words):
+    """Group words into lines by their top coordinate, top-to-bottom"""
+    lines = []
+    for word in sorted(words, key=lambda w: (w['top'], w['x0'])):
+        if lines and abs(word['top'] - lines[-1][0]['top']) <= LINE_TOLERANCE:
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+    return [sorted(line, key=lambda w: w['x0']) for line in lines]
+
+
+def _find_gutter(lines, page_width):
+    """Find the widest vertical gap that splits the page into two columns.
+
+    Returns an (x0, x1) tuple or None for single-column pages.
+    """
+    if len(lines) < 2:
+        return None
+    width = int(page_width) + 1
+    coverage = [0] * width
+    for line in lines:
+        covered = set()
+        for word in line:
+            covered.update(range(max(int(word['x0']), 0), min(int(word['x1']) + 1, width)))
+        for x in covered:
+            coverage[x] += 1
+
+    # Only consider the middle of the page, margins are always empty
+    limit = len(lines) * GUTTER_MAX_COVERAGE
+    left, right = int(width * 0.2), int(width * 0.8)
+    best, start = None, None
+    for x in range(left, right + 1):
+        if x < right and coverage[x] <= limit:
+            if start is None:
+                start = x
+            continue
+        if start is not None:
+            if x - start >= MIN_GUTTER_WIDTH and (best is None or x - start > best[1] - best[0]):
+                best = (start, x)
+            start = None
+
+    # A gutter needs text on both sides of it
+    if best and any(coverage[:best[0]]) and any(coverage[best[1]:]):
+        return best
+    return None
+
+
+def _split_blocks(lines):
+    """Split a column's lines into blocks wherever the vertical gap grows"""
+    blocks = []
+    for line in lines:
+        if blocks:
+            previous = blocks[-1][-1]
+            height = max(w['bottom'] - w['top'] for w in previous) or 1
+            gap = min(w['top'] for w in line) - max(w['bottom'] for w in previous)
+            if gap <= height * BLOCK_GAP_FACTOR:
+                blocks[-1].append(line)
+                continue
+        blocks.append([line])
+    return blocks
+
+
+def _page_blocks(words, page_width):
+    """Return a page's words as blocks of lines in reading order.
+
+    Lines that cross the gutter (e.g. a full-width header) are emitted on
+    their own; the lines between them are read left column, then right.
+    """
+    lines = _group_lines(words)
+    gutter = _find_gutter(lines, page_width)
+    if gutter is None:
+        return _split_blocks(lines)
+
+    blocks = []
+    left, right = [], []
+
+    def flush():
+        blocks.extend(_split_blocks(left))
+        blocks.extend(_split_blocks(right))
+        left.clear()
+        right.clear()
+
+    for line in lines:
+        if any(w['x0'] < gutter[1] and w['x1'] > gutter[0] for w in line):
+            flush()
+            blocks.append([line])
+            continue
+        line_left = [w for w in line if w['x1'] <= gutter[0]]
+        line_right = [w for w in line if w['x0'] >= gutter[1]]
+        if line_left:
+            left.append(line_left)
+        if line_right:
+            right.append(line_right)
+    flush()
+    return blocks
+
+
+class DocumentLimitError(Exception):
+    """Raised when a document exceeds a per-document resource limit"""
+
+    def __init__(self, limit, value, maximum):
+        self.limit = limit
+        self.value = value
+        self.maximum = maximum
+        super().__init__(f"Document exceeds {limit} limit: {value} > {maximum}")
+
+
 class ModernResumeParser:
-    def __init__(self, pdf_path):
+    # Bump a field's version whenever its extractor's logic or keyword list
+    # changes; cached documents then re-run only that extractor on backfill
+    EXTRACTOR_VERSIONS = {
+        "name": 3,
+        "email": 2,
+        "mobile_number": 2,
+        "skills": 1,
+        "college_name": 2,
+        "degree": 3,
+        "designation": 2,
+        "company_names": 4,
+        "no_of_pages": 1,
+        "total_experience": 1
+    }
+    # Fields whose extractors read spaCy entities, re-run when the pipeline changes
+    NER_FIELDS = ("name", "college_name", "company_names")
+
+    def __init__(self, pdf_path, layout=False, nlp=None, max_pages=None, max_chars=None,
+                 artifact_store=None, record=None):
+        # A path, or a file-like object such as an in-memory upload
         self.pdf_path = pdf_path
-        self.nlp = spacy.load('en_core_web_sm')
-        self.text = self._extract_text_from_pdf()
+        self.layout = layout
+        # Long-lived callers (e.g. worker processes) pass a loaded model to reuse
+        self.nlp = nlp if nlp is not None else spacy.load('en_core_web_sm')
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        # Coordinate index of every word, filled in layout mode
+        self.words = []
+        self.page_count = None
+        self._doc = None
+        # Ranked candidates and the cascade stages run, per field
+        self.candidates = {}
+        self.tiers = {}
+
+        # Reuse text, Doc and page count cached by an earlier parse of the same PDF
+        self.artifact_store = artifact_store
+        self.artifact_key = record['key'] if record else None
+        if artifact_store is not None and record is None:
+            self.artifact_key, record = artifact_store.load_for(pdf_path, layout, self.nlp)
+        self.record = record
+
+        if record:
+            self.text = record['text']
+            self.words = record['words']
+            self.page_count = record['page_count']
+            self._doc = record['doc']
+            # Candidates of fields that aren't re-run come from the cache
+            self.candidates = dict(record.get('candidates', {}))
+            self._check_pages(self.page_count)
+        elif layout:
+            self.text = self._extract_layout_from_pdf()
+        else:
+            self.text = self._extract_text_from_pdf()
+        self._check_chars(len(self.text))
+
+    @classmethod
+    def from_record(cls, record, artifact_store, nlp=None):
+        """Build a parser from cached artifacts without touching the PDF"""
+        return cls(record['source'], layout=record['layout'], nlp=nlp,
+                   artifact_store=artifact_store, record=record)
+
+    @property
+    def doc(self):
+        """spaCy Doc for the full text, computed once and shared by all extractors"""
+        if self._doc is None:
+            self._doc = self.nlp(self.text)
+        return self._doc
+
+    def _check_pages(self, page_count):
+        """Reject documents with more pages than allowed"""
+        if self.max_pages is not None and page_count > self.max_pages:
+            raise DocumentLimitError('pages', page_count, self.max_pages)
+
+    def _check_chars(self, char_count):
+        """Reject documents with more text than allowed"""
+        if self.max_chars is not None and char_count > self.max_chars:
+            raise DocumentLimitError('chars', char_count, self.max_chars)
         
     def _extract_text_from_pdf(self):
         """Extract text from PDF using pdfplumber"""
+        page_texts = []
         with pdfplumber.open(self.pdf_path) as pdf:
-            text = ''.join(page.extract_text() or '' for page in pdf.pages)
-        return text
+            self.page_count = len(pdf.pages)
+            self._check_pages(self.page_count)
+            for page in pdf.pages:
+                page_texts.append(page.extract_text() or '')
+                page.flush_cache()
+                # Stop early instead of extracting the rest of an oversized document
+                self._check_chars(sum(len(t) for t in page_texts))
+        return '\n'.join(page_texts)
+
+    def _extract_layout_from_pdf(self):
+        """Extract reading-order text from word boxes, one pass per page.
+
+        Columns are read one after another and blocks are separated by a
+        blank line. Every word is also kept in ``self.words`` with its page,
+        block, coordinates and font size so extractors can query the layout.
+        """
+        page_texts = []
+        block_id = 0
+        with pdfplumber.open(self.pdf_path) as pdf:
+            self.page_count = len(pdf.pages)
+            self._check_pages(self.page_count)
+            for page_number, page in enumerate(pdf.pages, start=1):
+                words = page.extract_words(extra_attrs=['size'])
+                block_texts = []
+                for block in _page_blocks(words, page.width):
+                    for line in block:
+                        for word in line:
+                            self.words.append({
+                                'text': word['text'],
+                                'page': page_number,
+                                'block': block_id,
+                                'x0': word['x0'],
+                                'x1': word['x1'],
+                                'top': word['top'],
+                                'bottom': word['bottom'],
+                                'size': word.get('size', 0),
+                            })
+                    block_texts.append('\n'.join(' '.join(w['text'] for w in line) for line in block))
+                    block_id += 1
+                page_texts.append('\n\n'.join(block_texts))
+                # Drop pdfplumber's cached objects for this page
+                page.flush_cache()
+                self._check_chars(sum(len(t) for t in page_texts))
+        return '\n\n'.join(page_texts)
+
+    def largest_font_text(self, page=1):
+        """Return the text set in the largest font on a page (layout mode only)"""
+        words = [w for w in self.words if w['page'] == page]
+        if not words:
+            return None
+        largest = max(w['size'] for w in words)
+        words = [w for w in words if largest - w['size'] <= FONT_SIZE_TOLERANCE]
+        # Keep only the first block in that size, e.g. the name and not a section title
+        words = [w for w in words if w['block'] == words[0]['block']]
+        return ' '.join(w['text'] for w in words)
     
-    def get_extracted_data(self):
-        """Extract various information from resume"""
-        doc = self.nlp(self.text)  # Check first 100 chars
-        for ent in doc.ents:
-            print(ent.text, ent.label_)
-        data = {
-            "name": self._extract_name(),
-            "email": self._extract_email(),
-            "mobile_number": self._extract_phone(),
-            "skills": self._extract_skills(),
-            "college_name": self._extract_education(),
-            "degree": self._extract_degree(),
-            "designation": self._extract_designation(),
-            "company_names": self._extract_companies(),
-            "no_of_pages": self._get_page_count(),
-            "total_experience": self._extract_experience()
+    def _extractors(self):
+        """Map each output field to the method that extracts it"""
+        return {
+            "name": self._extract_name,
+            "email": self._extract_email,
+            "mobile_number": self._extract_phone,
+            "skills": self._extract_skills,
+            "college_name": self._extract_education,
+            "degree": self._extract_degree,
+            "designation": self._extract_designation,
+            "company_names": self._extract_companies,
+            "no_of_pages": self._get_page_count,
+            "total_experience": self._extract_experience
         }
-        insert_into_db(data)  # Hypothetical function to store data
+
+    @classmethod
+    def stale_fields_for(cls, record, pipeline):
+        """Fields of a cached record that are missing or were made by an older extractor.
+
+        NER fields are also stale when the record's entities came from a
+        spaCy pipeline other than ``pipeline`` (see ``pipeline_id``).
+        """
+        versions = record['versions']
+        stale = [field for field, version in cls.EXTRACTOR_VERSIONS.items()
+                 if versions.get(field) != version or field not in record['data']]
+        # None means no Doc was cached; a missing key predates pipeline stamps
+        if record.get('pipeline', 'unknown') not in (None, pipeline):
+            stale += [field for field in cls.NER_FIELDS if field not in stale]
+        return stale
+
+    def stale_fields(self):
+        """Fields whose cached value is missing or was made by an older extractor"""
+        if not self.record:
+            return list(self.EXTRACTOR_VERSIONS)
+        return self.stale_fields_for(self.record, pipeline_id(self.nlp))
+
+    def extract_fields(self, fields=None):
+        """Run the extractors for the given fields (all if None) and return the data.
+
+        Fields that are not re-run keep their cached value. The result is
+        saved back to the artifact store when one is configured.
+        """
+        if fields is None:
+            fields = list(self.EXTRACTOR_VERSIONS)
+        cached = self.record['data'] if self.record else {}
+        extractors = self._extractors()
+        data = {}
+        for field in self.EXTRACTOR_VERSIONS:
+            data[field] = extractors[field]() if field in fields else cached.get(field)
+        record_cascade_tiers(self.tiers)
+
+        if self.artifact_store is not None and (fields or not self.record):
+            # The cache is only an optimisation, a failed write mustn't fail the parse
+            try:
+                self.artifact_store.save(self, data)
+            except Exception as e:
+                print(f"Could not cache extraction for {self.artifact_key}: {str(e)}")
+        return data
+
+    def get_extracted_data(self, update_db=True):
+        """Extract various information from resume, storing it in MySQL if update_db"""
+        data = self.extract_fields(self.stale_fields())
+        if update_db:
+            insert_into_db(data, self.artifact_key)  # Hypothetical function to store data
         return data
     
+    def _cascade(self, field, tiers, collect_all=False):
+        """Run candidate stages cheapest first until one is confident.
+
+        Args:
+            field: Output field the candidates are for
+            tiers: List of (stage name, candidate function) pairs, cheapest first
+            collect_all: Run every stage; for multi-value fields, where one
+                confident candidate says nothing about the ones still missing
+
+        Returns:
+            Ranked candidates from every stage that ran
+        """
+        candidates = []
+        fired = []
+        for tier, generate in tiers:
+            fired.append(tier)
+            new = [dict(cand, source=f"{tier}:{cand['source']}") for cand in generate()]
+            candidates = _rank_candidates(candidates + new)
+            if not collect_all and candidates and candidates[0]['score'] >= CONFIDENCE_THRESHOLD:
+                break
+        self.candidates[field] = candidates
+        self.tiers[field] = fired
+        return candidates
+
+    def _best(self, field, tiers):
+        """Value of the top-ranked candidate, or None if it scores below MIN_CONFIDENCE"""
+        candidates = self._cascade(field, tiers)
+        if candidates and candidates[0]['score'] >= MIN_CONFIDENCE:
+            return candidates[0]['value']
+        return None
+
+    @staticmethod
+    def _looks_like_name(text):
+        """2-4 alphabetic words that aren't a heading, institution or job title"""
+        words = text.split()
+        return (2 <= len(words) <= 4 and all(word.isalpha() for word in words) and
+                not any(word.lower() in NON_NAME_WORDS for word in words))
+
     def _extract_name(self):
-        """Extract name using spaCy NER and common patterns"""
-        # First try spaCy NER on the first part of the document
-        doc = self.nlp(self.text[:100])  # Check first 100 chars
-        for ent in doc.ents:
-            # print(ent.text, ent.label_)
+        """Extract name from the first lines, the layout and spaCy NER, cheapest first"""
+        tiers = [("cheap", self._name_line_candidates)]
+        if self.layout:
+            tiers.append(("layout", self._name_layout_candidates))
+        tiers.append(("ner", self._name_ner_candidates))
+        return self._best("name", tiers)
+
+    def _name_line_candidates(self):
+        """Look for name patterns in the first few lines"""
+        candidates = []
+        lines = [line.strip() for line in self.text.split('\n')[:10]]  # Check first 10 lines
+        lines = [line for line in lines if line]
+        for i, line in enumerate(lines):
+            # Skip lines with emails/phones
+            if '@' in line or re.search(r'\d{10}', line):
+                continue
+            if self._looks_like_name(line):
+                # The very first line of a resume is usually the name
+                candidates.append(_candidate(line, 0.85 if i == 0 else 0.6 - 0.05 * i, "first_lines"))
+        return candidates
+
+    def _name_layout_candidates(self):
+        """In layout mode the name is usually the largest text on the first page"""
+        text = self.largest_font_text(page=1)
+        if text and self._looks_like_name(text):
+            return [_candidate(text, 0.9, "largest_font")]
+        return []
+
+    def _name_ner_candidates(self):
+        """PERSON entities near the start of the document"""
+        candidates = []
+        for ent in self.doc.ents:
+            if ent.start_char >= 100:  # Check first 100 chars
+                break
             if ent.label_ == "PERSON":
                 # Filter out common false positives
                 if len(ent.text.split()) >= 2 and ent.text.lower() not in ['microsoft azure', 'bachelor of technology']:
-                    return ent.text
-        
-        # Fallback: Look for name patterns in the first few lines
-        lines = self.text.split('\n')[:10]  # Check first 10 lines
-        for line in lines:
-            line = line.strip()
-            # Skip empty lines and lines with emails/phones
-            if line and '@' not in line and not re.search(r'\d{10}', line):
-                # Check if line looks like a name (2-4 words, mostly alphabetic)
-                words = line.split()
-                if 2 <= len(words) <= 4 and all(word.isalpha() for word in words):
-                    return line
-        
-        return None
+                    candidates.append(_candidate(ent.text, 0.8, "person"))
+        return candidates
     
     def _extract_email(self):
         """Extract email using regex"""
+        return self._best("email", [("cheap", self._email_candidates)])
+
+    def _email_candidates(self):
+        """Every email address, those in the header ranked first"""
         email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, self.text)
-        return emails[0] if emails else None
+        return [_candidate(m.group(), 0.95 if m.start() < 500 else 0.85, "regex")
+                for m in re.finditer(email_pattern, self.text)]
     
     def _extract_phone(self):
         """Extract phone number using regex"""
+        return self._best("mobile_number", [("cheap", self._phone_candidates)])
+
+    def _phone_candidates(self):
+        """Phone numbers from several formats, scored by how specific the format is"""
         # Multiple phone patterns
         patterns = [
-            r'\b\d{10}\b',  # 10 digits
-            r'\+91\d{10}\b',
-            r"^[+]{1}(?:[0-9\\-\\(\\)\\/" \
-              "\\.]\\s?){6,15}[0-9]{1}$",  # International format
-            r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',  # XXX-XXX-XXXX format
-            r'\b\(\d{3}\)\s?\d{3}[-.]?\d{4}\b',  # (XXX) XXX-XXXX format
-            r'\b\+\d{1,3}[-.]?\d{3,4}[-.]?\d{3,4}[-.]?\d{3,4}\b'  # International format
+            (r'\b\d{10}\b', 0.8, "10_digit"),  # 10 digits
+            (r'\+91\d{10}\b', 0.95, "india"),
+            (r"^[+]{1}(?:[0-9\\-\\(\\)\\/" \
+              "\\.]\\s?){6,15}[0-9]{1}$", 0.7, "international"),  # International format
+            (r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', 0.85, "dashed"),  # XXX-XXX-XXXX format
+            (r'\b\(\d{3}\)\s?\d{3}[-.]?\d{4}\b', 0.9, "parentheses"),  # (XXX) XXX-XXXX format
+            (r'\b\+\d{1,3}[-.]?\d{3,4}[-.]?\d{3,4}[-.]?\d{3,4}\b', 0.75, "international")  # International format
         ]
         
-        for pattern in patterns:
-            phones = re.findall(pattern, self.text)
-            if phones:
-                return phones[0]
-        return None
+        candidates = []
+        for pattern, score, source in patterns:
+            for phone in re.findall(pattern, self.text):
+                candidates.append(_candidate(phone, score, source))
+        return candidates
     
     def _extract_skills(self):
         """Extract skills from a predefined list"""
@@ -192,40 +662,53 @@ class ModernResumeParser:
     
     def _extract_education(self):
         """Extract education information"""
-        # Common university/college keywords
-        edu_keywords = [
-            'university', 'college', 'institute', 'school', 'institution',
-            'IIT', 'NIT', 'MIT', 'Stanford', 'Harvard'
-        ]
-        
+        return self._best("college_name", [
+            ("cheap", self._education_pattern_candidates),
+            ("ner", self._education_ner_candidates)
+        ])
+
+    def _education_pattern_candidates(self):
+        """Institution lines under an education heading or just above a degree"""
         # Look for education section patterns
         education_patterns = [
-            r'(?i)education.*?\n(.*?(?:university|college|institute|institution).*?)(?:\n|$)',
-            r'(?i)(.*?(?:university|college|institute|institution).*?)(?:\n.*?(?:degree|bachelor|master|b\.?tech|m\.?tech))',
+            (r'(?i)education.*?\n(.*?(?:university|college|institute|institution).*?)(?:\n|$)', 0.85, "education_section"),
+            (r'(?i)(.*?(?:university|college|institute|institution).*?)(?:\n.*?(?:degree|bachelor|master|b\.?tech|m\.?tech))', 0.7, "before_degree"),
         ]
         
-        for pattern in education_patterns:
+        candidates = []
+        for pattern, score, source in education_patterns:
             matches = re.findall(pattern, self.text, re.MULTILINE | re.DOTALL)
-            if matches:
-                for match in matches:
-                    if isinstance(match, tuple):
-                        match = match[0]
-                    # Clean up the match
-                    match = re.sub(r'\s+', ' ', match.strip())
-                    if len(match) > 5 and len(match) < 100:  # Reasonable length
-                        return match
+            for match in matches:
+                if isinstance(match, tuple):
+                    match = match[0]
+                # Clean up the match
+                match = re.sub(r'\s+', ' ', match.strip())
+                if len(match) > 5 and len(match) < 100:  # Reasonable length
+                    candidates.append(_candidate(match, score, source))
+        return candidates
+
+    def _education_ner_candidates(self):
+        """ORG entities that mention a university/college keyword"""
+        # Common university/college keywords
+        edu_keywords = [
+            'university', 'college', 'institute', 'school', 'institution',
+            'IIT', 'NIT', 'MIT', 'Stanford', 'Harvard'
+        ]
         
-        # Fallback to NER
-        doc = self.nlp(self.text)
-        for ent in doc.ents:
+        candidates = []
+        for ent in self.doc.ents:
             if ent.label_ == "ORG":
                 org_text = ent.text.lower()
                 if any(keyword in org_text for keyword in edu_keywords) and len(ent.text) > 10:
-                    return ent.text
-        return None
+                    candidates.append(_candidate(ent.text, 0.75, "org"))
+        return candidates
     
     def _extract_degree(self):
         """Extract degree information"""
+        return self._best("degree", [("cheap", self._degree_candidates)])
+
+    def _degree_candidates(self):
+        """Degree mentions, full names ranked above ambiguous two-letter abbreviations"""
         degree_patterns = [
             r'\b(B\.?Tech|Bachelor of Technology|BE|Bachelor of Engineering)\b',
             r'\b(B\.?E\.?)\b',
@@ -237,14 +720,29 @@ class ModernResumeParser:
             r'\b(BA|Bachelor of Arts|MA|Master of Arts)\b'
         ]
         
+        candidates = []
         for pattern in degree_patterns:
-            matches = re.findall(pattern, self.text, re.IGNORECASE)
-            if matches:
-                return matches[0]
-        return None
+            for found in re.finditer(pattern, self.text, re.IGNORECASE):
+                match = found.group(1)
+                if ' ' in match:
+                    score, source = 0.95, "full_name"
+                elif len(match) > 2:
+                    score, source = 0.9, "abbreviation"
+                elif match.isupper() and re.match(r'\.?\s*(?:in|of)\b|\.?\s*[(-]', self.text[found.end():]):
+                    # "BE in Mechanical", "MS (Computer Science)"
+                    score, source = 0.6, "short_abbreviation"
+                else:
+                    # "be", "ABOUT ME", "MS Office"... are rarely degrees
+                    score, source = (0.3, "short_abbreviation") if match.isupper() else (0.2, "short_abbreviation")
+                candidates.append(_candidate(match, score, source))
+        return candidates
     
     def _extract_designation(self):
         """Extract current or recent job designation"""
+        return self._best("designation", [("cheap", self._designation_candidates)])
+
+    def _designation_candidates(self):
+        """Known job titles, the most specific ones and those under an experience heading first"""
         # Common job titles
         job_titles = [
             'Software Engineer', 'Senior Software Engineer', 'Lead Software Engineer',
@@ -253,39 +751,79 @@ class ModernResumeParser:
             'DevOps Engineer', 'Full Stack Developer', 'Frontend Developer', 'Backend Developer',
             'Machine Learning Engineer', 'AI Engineer', 'Research Scientist'
         ]
-        
+
+        matches = []
         for title in job_titles:
-            if title.lower() in self.text.lower():
-                return title
-        return None
-    
+            for found in re.finditer(r'\b' + re.escape(title) + r'\b', self.text, re.IGNORECASE):
+                matches.append((found.start(), found.end(), title))
+        # "Software Engineer" inside "Senior Software Engineer" is the same mention
+        matches = [m for m in matches
+                   if not any(o[0] <= m[0] and m[1] <= o[1] and o != m for o in matches)]
+
+        headings = [h.end() for h in re.finditer(r'(?im)^\s*(?:work\s+|professional\s+)?experience\b', self.text)]
+        candidates = []
+        for start, _, title in sorted(matches):
+            # Longer titles are more specific: "Senior Software Engineer" over "Software Engineer"
+            score = 0.6 + 0.1 * (len(title.split()) - 1)
+            source = "title"
+            if any(0 <= start - heading <= DESIGNATION_HEADING_DISTANCE for heading in headings):
+                score += 0.15
+                source = "experience_section"
+            candidates.append(_candidate(title, score, source))
+        return candidates
+
     def _extract_companies(self):
-        """Extract company names using NER"""
-        doc = self.nlp(self.text)
-        companies = []
-        
-        # Common false positives to filter out
-        false_positives = [
-            'university', 'college', 'school', 'institute', 'institution',
-            'bachelor of technology', 'master of science', 'phd', 'degree',
-            'certification', 'certifications', 'version control', 'cicd',
-            'iac', 'rbac', 'api management', 'cloud security', 'hands'
-        ]
-        
-        for ent in doc.ents:
-            if ent.label_ == "ORG":
-                # Filter out educational institutions and false positives
-                ent_lower = ent.text.lower().strip()
-                if (not any(fp in ent_lower for fp in false_positives) and
-                    len(ent.text.strip()) > 2 and
-                    len(ent.text.strip()) < 50 and
-                    not ent.text.strip().startswith('•')):
-                    companies.append(ent.text.strip())
-        
-        return list(set(companies))  # Remove duplicates
+        """Extract company names from suffix patterns, and NER if none is confident.
+
+        A legal suffix ("Acme Pvt Ltd") is confident enough to skip NER, at
+        the cost of missing companies named without one elsewhere in the
+        resume; set COMPANY_NER_ALWAYS to always run both stages.
+        """
+        candidates = self._cascade("company_names", [
+            ("cheap", self._company_pattern_candidates),
+            ("ner", self._company_ner_candidates)
+        ], collect_all=COMPANY_NER_ALWAYS)
+        return [cand['value'] for cand in candidates if cand['score'] >= MIN_CONFIDENCE]
+
+    @staticmethod
+    def _is_company_name(text):
+        """Filter out educational institutions and false positives"""
+        text_lower = text.lower()
+        return (not any(fp in text_lower for fp in COMPANY_FALSE_POSITIVES) and
+                len(text) > 2 and
+                len(text) < 50 and
+                not text.startswith('•'))
+
+    def _company_pattern_candidates(self):
+        """Capitalised names ending in Ltd, Inc, Technologies, etc.
+
+        Names ending in a generic suffix score below MIN_CONFIDENCE, so they
+        are only reported when NER finds the same organisation.
+        """
+        candidates = []
+        for match, suffix in re.findall(COMPANY_PATTERN, self.text):
+            words = match.split()
+            # Drop a job title in front of the name ("Senior Developer Tata Consultancy Services")
+            while len(words) > 2 and words[0].lower() in COMPANY_TITLE_WORDS:
+                words.pop(0)
+            name = ' '.join(words)
+            if not self._is_company_name(name):
+                continue
+            generic = suffix.lower() in GENERIC_COMPANY_SUFFIXES
+            candidates.append(_candidate(name, 0.4 if generic else 0.8,
+                                         "generic_suffix" if generic else "legal_suffix"))
+        return candidates
+
+    def _company_ner_candidates(self):
+        """ORG entities that aren't institutions or known false positives"""
+        return [_candidate(ent.text.strip(), 0.7, "org")
+                for ent in self.doc.ents
+                if ent.label_ == "ORG" and self._is_company_name(ent.text.strip())]
     
     def _get_page_count(self):
         """Get number of pages in PDF"""
+        if self.page_count is not None:
+            return self.page_count
         with pdfplumber.open(self.pdf_path) as pdf:
             return len(pdf.pages)
     
@@ -305,5 +843,5 @@ class ModernResumeParser:
         return None
 
 # Usage function to replace the original ResumeParser
-def ResumeParser(pdf_path):
-    return ModernResumeParser(pdf_path)
\ No newline at end of file
+def ResumeParser(pdf_path, layout=False, **kwargs):
+    return ModernResumeParser(pdf_path, layout=layout, **kwargs)
\ No newline at end of file
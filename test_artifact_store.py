@@ -0,0 +1,131 @@
+import io
+
+import pytest
+import spacy
+from spacy.language import Language
+
+import artifact_store
+from artifact_store import ArtifactStore
+from modern_resume_parser import ModernResumeParser
+
+nlp = spacy.blank('en')
+
+TEXT = "Jane Doe\njane@example.com\nExperience\nSoftware Engineer at Globex"
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / "resume.pdf"
+    path.write_bytes(b"%PDF-1.4 resume")
+    return path
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(tmp_path / "artifacts")
+
+
+@pytest.fixture
+def extract_text(monkeypatch):
+    """Stand in for pdfplumber, counting how often a PDF is opened"""
+    calls = []
+
+    def fake_extract(parser):
+        calls.append(parser.pdf_path)
+        parser.page_count = 1
+        return TEXT
+
+    monkeypatch.setattr(ModernResumeParser, "_extract_text_from_pdf", fake_extract)
+    return calls
+
+
+def _parse(pdf, store):
+    parser = ModernResumeParser(pdf, nlp=nlp, artifact_store=store)
+    return parser, parser.extract_fields(parser.stale_fields())
+
+
+def test_key_depends_on_content_not_name(tmp_path, pdf):
+    copy = tmp_path / "renamed.pdf"
+    copy.write_bytes(pdf.read_bytes())
+    assert ArtifactStore.document_key(pdf) == ArtifactStore.document_key(copy)
+    assert ArtifactStore.document_key(pdf) == ArtifactStore.document_key(io.BytesIO(pdf.read_bytes()))
+
+
+def test_key_changes_with_layout_and_extraction_version(pdf, monkeypatch):
+    text_key = ArtifactStore.document_key(pdf)
+    layout_key = ArtifactStore.document_key(pdf, layout=True)
+    assert text_key != layout_key
+
+    monkeypatch.setattr(artifact_store, "TEXT_EXTRACTION_VERSION", 99)
+    assert ArtifactStore.document_key(pdf) not in (text_key, layout_key)
+    assert ArtifactStore.document_key(pdf, layout=True) == layout_key
+
+
+def test_cache_hit_skips_the_pdf(pdf, store, extract_text):
+    first, data = _parse(pdf, store)
+    assert data["name"] == "Jane Doe"
+    assert extract_text == [pdf]
+
+    cached, cached_data = _parse(pdf, store)
+    assert extract_text == [pdf]
+    assert cached.record is not None
+    assert cached_data == data
+    assert cached.candidates == first.candidates
+
+
+def test_backfill_reruns_only_bumped_fields(pdf, store, extract_text, monkeypatch):
+    parser, data = _parse(pdf, store)
+    # Globex has no legal suffix, so company extraction needed the Doc
+    assert store.load_meta(parser.artifact_key)["pipeline"] is not None
+    assert store.backfill(nlp=nlp, update_db=False)["updated"] == 0
+
+    monkeypatch.setitem(ModernResumeParser.EXTRACTOR_VERSIONS, "company_names", 99)
+
+    def no_spacy(self, text, **kwargs):
+        raise AssertionError("the cached Doc should be reused")
+
+    monkeypatch.setattr(Language, "__call__", no_spacy)
+    stats = store.backfill(nlp=nlp, update_db=False)
+    assert stats["updated"] == 1
+    assert stats["extractors_run"] == {"company_names": 1}
+
+    meta = store.load_meta(parser.artifact_key)
+    assert meta["versions"]["company_names"] == 99
+    assert meta["data"] == data
+    assert extract_text == [pdf]
+
+
+def test_pipeline_change_reruns_ner_fields(pdf, store, extract_text):
+    parser, _ = _parse(pdf, store)
+    other = spacy.blank('en')
+    other.meta['version'] = '9.9.9'
+
+    assert store.load(parser.artifact_key, other)['doc'] is None
+    stats = store.backfill(nlp=other, update_db=False)
+    assert stats["extractors_run"] == {field: 1 for field in ModernResumeParser.NER_FIELDS}
+
+
+def test_backfill_skips_outdated_extraction(pdf, store, extract_text, monkeypatch):
+    _parse(pdf, store)
+    monkeypatch.setattr(artifact_store, "TEXT_EXTRACTION_VERSION", 99)
+    monkeypatch.setitem(ModernResumeParser.EXTRACTOR_VERSIONS, "skills", 99)
+    stats = store.backfill(nlp=nlp, update_db=False)
+    assert stats["outdated_extraction"] == 1
+    assert stats["updated"] == 0
+
+
+def test_save_leaves_no_temporary_files(pdf, store, extract_text):
+    parser, _ = _parse(pdf, store)
+    _parse(pdf, store)
+    files = sorted(p.name for p in (store.directory / parser.artifact_key).iterdir())
+    assert files == ["doc.spacy", "meta.json", "text.txt"]
+
+
+def test_failed_save_does_not_fail_the_parse(pdf, store, extract_text, monkeypatch):
+    def fail(parser, data):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "save", fail)
+    _, data = _parse(pdf, store)
+    assert data["email"] == "jane@example.com"
+    assert store.keys() == []
@@ -0,0 +1,158 @@
+import spacy
+
+import modern_resume_parser
+from modern_resume_parser import (AGREEMENT_BONUS, CONFIDENCE_THRESHOLD, ModernResumeParser,
+                                  _candidate, _rank_candidates, cascade_stats)
+
+nlp = spacy.blank('en')
+
+
+def _parser(text, entities=(), **record):
+    """Parser over cached text, with the given (text, label) entities on its Doc"""
+    doc = nlp(text)
+    spans = []
+    for ent_text, label in entities:
+        start = text.index(ent_text)
+        spans.append(doc.char_span(start, start + len(ent_text), label=label))
+    doc.ents = spans
+    record = {'key': None, 'source': 'resume.pdf', 'layout': False, 'text': text, 'words': [],
+              'page_count': 1, 'doc': doc, 'versions': {}, 'data': {}, **record}
+    return ModernResumeParser.from_record(record, None, nlp=nlp)
+
+
+def _stage(candidates, calls=None):
+    def generate():
+        if calls is not None:
+            calls.append(True)
+        return candidates
+    return generate
+
+
+def test_rank_candidates_sorts_by_score():
+    ranked = _rank_candidates([_candidate("a", 0.6, "cheap:x"), _candidate("b", 0.9, "cheap:y"),
+                               _candidate("c", 0.6, "cheap:z")])
+    assert [c['value'] for c in ranked] == ["b", "a", "c"]
+
+
+def test_rank_candidates_adds_bonus_when_stages_agree():
+    ranked = _rank_candidates([_candidate("Jane Doe", 0.85, "cheap:first_lines"),
+                               _candidate("jane doe", 0.8, "ner:person")])
+    assert len(ranked) == 1
+    assert ranked[0]['value'] == "Jane Doe"
+    assert ranked[0]['score'] == round(0.85 + AGREEMENT_BONUS, 2)
+    assert ranked[0]['source'] == "cheap:first_lines+ner:person"
+
+
+def test_rank_candidates_no_bonus_within_one_stage():
+    ranked = _rank_candidates([_candidate("5551234567", 0.8, "cheap:10_digit"),
+                               _candidate("5551234567", 0.85, "cheap:dashed")])
+    assert ranked[0]['score'] == 0.85
+    assert ranked[0]['source'] == "cheap:10_digit+cheap:dashed"
+
+
+def test_rank_candidates_caps_score_at_one():
+    ranked = _rank_candidates([_candidate("x", 1.0, "cheap:a"), _candidate("x", 1.0, "ner:b")])
+    assert ranked[0]['score'] == 1.0
+
+
+def test_cascade_stops_at_threshold():
+    parser = _parser("text")
+    later = []
+    candidates = parser._cascade("name", [("cheap", _stage([_candidate("a", CONFIDENCE_THRESHOLD, "m")])),
+                                          ("ner", _stage([_candidate("b", 0.9, "m")], later))])
+    assert later == []
+    assert [c['source'] for c in candidates] == ["cheap:m"]
+    assert parser.tiers["name"] == ["cheap"]
+    assert parser.candidates["name"] == candidates
+
+
+def test_cascade_continues_below_threshold():
+    parser = _parser("text")
+    candidates = parser._cascade("name", [("cheap", _stage([_candidate("a", 0.6, "m")])),
+                                          ("ner", _stage([_candidate("b", 0.7, "m")]))])
+    assert [c['value'] for c in candidates] == ["b", "a"]
+    assert parser.tiers["name"] == ["cheap", "ner"]
+
+
+def test_cascade_collect_all_runs_every_stage():
+    parser = _parser("text")
+    later = []
+    parser._cascade("company_names", [("cheap", _stage([_candidate("a", 0.95, "m")])),
+                                      ("ner", _stage([], later))], collect_all=True)
+    assert later == [True]
+    assert parser.tiers["company_names"] == ["cheap", "ner"]
+
+
+def test_best_ignores_low_confidence_candidates():
+    parser = _parser("text")
+    assert parser._best("degree", [("cheap", _stage([_candidate("be", 0.2, "m")]))]) is None
+    assert parser.candidates["degree"][0]['value'] == "be"
+    assert parser._best("degree", [("cheap", _stage([_candidate("B.Tech", 0.9, "m")]))]) == "B.Tech"
+
+
+def test_name_from_first_line_skips_ner():
+    parser = _parser("Jane Doe\njane@example.com", entities=[("Jane Doe", "PERSON")])
+    assert parser._extract_name() == "Jane Doe"
+    assert parser.tiers["name"] == ["cheap"]
+
+
+def test_name_falls_back_to_ner():
+    text = "Curriculum Vitae\nContact: Jane Doe, jane@example.com"
+    parser = _parser(text, entities=[("Jane Doe", "PERSON")])
+    assert parser._extract_name() == "Jane Doe"
+    assert parser.tiers["name"] == ["cheap", "ner"]
+    assert parser.candidates["name"][0]['source'] == "ner:person"
+
+
+def test_extract_fields_records_tiers(monkeypatch):
+    monkeypatch.setattr(modern_resume_parser, "_cascade_counts", {})
+    parser = _parser("Jane Doe\njane@example.com")
+    data = parser.extract_fields(["name", "email"])
+    assert data["name"] == "Jane Doe"
+    assert data["email"] == "jane@example.com"
+    assert cascade_stats() == {"name": {"cheap": 1}, "email": {"cheap": 1}}
+
+
+def test_cached_candidates_are_kept_for_fields_not_rerun():
+    cached = {"email": [_candidate("jane@example.com", 0.95, "cheap:regex")]}
+    parser = _parser("Jane Doe\njane@example.com", candidates=cached,
+                     data={"email": "jane@example.com"})
+    parser.extract_fields(["name"])
+    assert parser.candidates["email"] == cached["email"]
+    assert parser.candidates["name"][0]['value'] == "Jane Doe"
+
+
+def test_confident_companies_skip_ner():
+    parser = _parser("Experience\nSoftware Engineer at Acme Pvt Ltd\nIntern at Globex Inc", doc=None)
+    assert parser._extract_companies() == ["Acme Pvt Ltd", "Globex Inc"]
+    assert parser.tiers["company_names"] == ["cheap"]
+    assert parser._doc is None
+
+
+def test_generic_company_suffix_needs_ner():
+    text = "Skills: Operating Systems\nExperience: Wipro Technologies"
+    parser = _parser(text, entities=[("Wipro Technologies", "ORG")])
+    assert parser._extract_companies() == ["Wipro Technologies"]
+    assert parser.tiers["company_names"] == ["cheap", "ner"]
+
+
+def test_company_ner_always(monkeypatch):
+    monkeypatch.setattr(modern_resume_parser, "COMPANY_NER_ALWAYS", True)
+    text = "Acme Pvt Ltd\nGoogle"
+    parser = _parser(text, entities=[("Google", "ORG")])
+    assert parser._extract_companies() == ["Acme Pvt Ltd", "Google"]
+    assert parser.tiers["company_names"] == ["cheap", "ner"]
+
+
+def test_designation_prefers_the_most_specific_title():
+    parser = _parser("Jane Doe\nSenior Software Engineer, Acme Pvt Ltd")
+    assert parser._extract_designation() == "Senior Software Engineer"
+    assert [c['value'] for c in parser.candidates["designation"]] == ["Senior Software Engineer"]
+
+
+def test_designation_prefers_titles_under_experience():
+    text = "Objective: grow into a Data Scientist\nExperience\nData Analyst, Acme Pvt Ltd"
+    parser = _parser(text)
+    assert parser._extract_designation() == "Data Analyst"
+    assert parser.candidates["designation"][0]['source'] == "cheap:experience_section"
+    assert parser.candidates["designation"][1]['value'] == "Data Scientist"
@@ -0,0 +1,74 @@
+from modern_resume_parser import _find_gutter, _group_lines, _page_blocks
+
+PAGE_WIDTH = 600
+
+
+def _word(text, x0, top, width=60, height=10):
+    return {'text': text, 'x0': x0, 'x1': x0 + width, 'top': top, 'bottom': top + height}
+
+
+def _texts(blocks):
+    return [[' '.join(w['text'] for w in line) for line in block] for block in blocks]
+
+
+def _two_columns(rows=12, header=True):
+    """Sidebar at x=40..160 and main column at x=320..440, optional full-width header"""
+    words = []
+    if header:
+        words += [_word('Jane', 40, 10), _word('Doe', 250, 10), _word('Header', 450, 10)]
+    for i in range(rows):
+        top = 40 + i * 14
+        words.append(_word(f'left{i}', 40, top, width=120))
+        words.append(_word(f'right{i}', 320, top, width=120))
+    return words
+
+
+def test_find_gutter_between_columns():
+    gutter = _find_gutter(_group_lines(_two_columns(header=False)), PAGE_WIDTH)
+    assert gutter is not None
+    x0, x1 = gutter
+    assert 160 < x0 and x1 <= 320
+
+
+def test_find_gutter_tolerates_a_full_width_header():
+    assert _find_gutter(_group_lines(_two_columns()), PAGE_WIDTH) is not None
+
+
+def test_find_gutter_single_column():
+    words = [_word(f'line{i}', 40, 40 + i * 14, width=500) for i in range(12)]
+    assert _find_gutter(_group_lines(words), PAGE_WIDTH) is None
+
+
+def test_find_gutter_needs_text_on_both_sides():
+    # Text only in the left half leaves a wide gap that isn't a gutter
+    words = [_word(f'line{i}', 40, 40 + i * 14, width=200) for i in range(12)]
+    assert _find_gutter(_group_lines(words), PAGE_WIDTH) is None
+
+
+def test_find_gutter_ignores_narrow_gaps():
+    words = []
+    for i in range(12):
+        words.append(_word(f'a{i}', 40, 40 + i * 14, width=255))
+        words.append(_word(f'b{i}', 300, 40 + i * 14, width=255))
+    assert _find_gutter(_group_lines(words), PAGE_WIDTH) is None
+
+
+def test_page_blocks_reads_left_column_before_right():
+    blocks = _texts(_page_blocks(_two_columns(), PAGE_WIDTH))
+    assert blocks[0] == ['Jane Doe Header']
+    assert blocks[1] == [f'left{i}' for i in range(12)]
+    assert blocks[2] == [f'right{i}' for i in range(12)]
+
+
+def test_page_blocks_splits_on_large_vertical_gaps():
+    words = [
+        _word('Experience', 40, 10, width=500),
+        _word('Acme', 40, 24, width=500),
+        _word('Education', 40, 100, width=500),
+    ]
+    assert _texts(_page_blocks(words, PAGE_WIDTH)) == [['Experience', 'Acme'], ['Education']]
+
+
+def test_page_blocks_groups_words_on_the_same_line():
+    words = [_word('Doe', 110, 11), _word('Jane', 40, 10)]
+    assert _texts(_page_blocks(words, PAGE_WIDTH)) == [['Jane Doe']]
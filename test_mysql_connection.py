@@ -33,6 +33,7 @@ def test_mysql_connection():
                 skills TEXT,
                 no_of_pages INT,
                 total_experience VARCHAR(50),
+                artifact_key VARCHAR(100) UNIQUE,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
             """
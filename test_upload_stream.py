@@ -0,0 +1,105 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from upload_stream import MULTIPART_OVERHEAD, read_pdf_upload
+
+MAX_SIZE = 1024 * 1024
+PDF = b"%PDF-1.4\n" + b"0" * 1000 + b"\n%%EOF"
+
+app = FastAPI()
+
+
+@app.post("/upload")
+async def upload(request: Request):
+    upload = await read_pdf_upload(request, MAX_SIZE, ["application/pdf"])
+    return {"filename": upload.filename, "size": upload.size,
+            "head": upload.buffer.read(len(b"%PDF-")).decode()}
+
+
+client = TestClient(app)
+
+
+def _post(files=None, data=None):
+    return client.post("/upload", files=files, data=data)
+
+
+def _part(name, content, filename=None, content_type=None):
+    disposition = f'form-data; name="{name}"'
+    if filename:
+        disposition += f'; filename="{filename}"'
+    headers = f"--xyz\r\nContent-Disposition: {disposition}\r\n"
+    if content_type:
+        headers += f"Content-Type: {content_type}\r\n"
+    return headers.encode() + b"\r\n" + content + b"\r\n"
+
+
+def _post_chunked(*chunks):
+    """Send a multipart body without a Content-Length, one chunk at a time"""
+    return client.post("/upload", content=iter(chunks),
+                       headers={"Content-Type": "multipart/form-data; boundary=xyz"})
+
+
+def test_valid_pdf():
+    response = _post(files={"file": ("resume.pdf", PDF, "application/pdf")})
+    assert response.status_code == 200
+    assert response.json() == {"filename": "resume.pdf", "size": len(PDF), "head": "%PDF-"}
+
+
+def test_rejects_content_that_is_not_a_pdf():
+    response = _post(files={"file": ("resume.pdf", b"<html>not a pdf</html>", "application/pdf")})
+    assert response.status_code == 400
+    assert "not a PDF" in response.json()["detail"]
+
+
+def test_rejects_file_shorter_than_the_magic_bytes():
+    response = _post(files={"file": ("resume.pdf", b"%P", "application/pdf")})
+    assert response.status_code == 400
+    assert "not a PDF" in response.json()["detail"]
+
+
+def test_rejects_wrong_part_content_type():
+    response = _post(files={"file": ("resume.txt", PDF, "text/plain")})
+    assert response.status_code == 400
+    assert "Invalid file type" in response.json()["detail"]
+
+
+def test_rejects_oversized_file():
+    big = b"%PDF-" + b"0" * MAX_SIZE
+    response = _post(files={"file": ("resume.pdf", big, "application/pdf")})
+    assert response.status_code == 400
+    assert "File size too large" in response.json()["detail"]
+
+
+def test_rejects_oversized_body_without_content_length():
+    junk = b"x" * (MAX_SIZE // 2)
+    response = _post_chunked(_part("junk", junk), _part("junk", junk), _part("junk", junk),
+                             _part("file", PDF, "resume.pdf", "application/pdf"), b"--xyz--\r\n")
+    assert response.status_code == 400
+    assert "File size too large" in response.json()["detail"]
+
+
+def test_rejects_large_fields_before_the_file():
+    response = _post(data={"junk": "x" * (MAX_SIZE + MULTIPART_OVERHEAD)},
+                     files={"file": ("resume.pdf", PDF, "application/pdf")})
+    assert response.status_code == 400
+    assert "File size too large" in response.json()["detail"]
+
+
+def test_stops_reading_after_the_file():
+    junk = b"x" * MAX_SIZE
+    response = _post_chunked(_part("file", PDF, "resume.pdf", "application/pdf"),
+                             _part("junk", junk), _part("junk", junk), b"--xyz--\r\n")
+    assert response.status_code == 200
+    assert response.json()["size"] == len(PDF)
+
+
+def test_missing_file_field():
+    response = _post(files={"other": ("resume.pdf", PDF, "application/pdf")})
+    assert response.status_code == 400
+    assert "Missing file field 'file'" in response.json()["detail"]
+
+
+def test_rejects_non_multipart_request():
+    response = client.post("/upload", content=PDF, headers={"Content-Type": "application/pdf"})
+    assert response.status_code == 400
+    assert "multipart/form-data" in response.json()["detail"]
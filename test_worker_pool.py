@@ -0,0 +1,142 @@
+import io
+
+import pytest
+
+from modern_resume_parser import DocumentLimitError
+from worker_pool import WorkerError, WorkerPool
+
+RESUME = ["Jane Doe", "jane@example.com", "Experience", "Engineer at Acme Pvt Ltd"]
+
+
+def make_pdf(pages):
+    """Minimal PDF with one page per list of text lines"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        stream = "BT /F1 12 Tf 14 TL 50 750 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+def upload(pages=(RESUME,)):
+    buffer = io.BytesIO(make_pdf(pages))
+    buffer.name = "resume.pdf"
+    return buffer
+
+
+@pytest.fixture
+def make_pool():
+    pools = []
+
+    def make(**kwargs):
+        # A blank pipeline keeps startup fast; replacements can take a while
+        kwargs = {'model': 'blank:en', 'update_db': False, 'acquire_timeout': 60, **kwargs}
+        pools.append(WorkerPool(**kwargs))
+        return pools[-1]
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+def test_parses_uploads_and_paths(make_pool, tmp_path):
+    pool = make_pool()
+    result = pool.parse(upload())
+    assert result['data']['name'] == "Jane Doe"
+    assert result['data']['company_names'] == ["Acme Pvt Ltd"]
+    assert result['tiers']['company_names'] == ["cheap"]
+    assert result['candidates']['email'][0]['value'] == "jane@example.com"
+
+    path = tmp_path / "resume.pdf"
+    path.write_bytes(make_pdf([RESUME]))
+    assert pool.parse(str(path))['data']['email'] == "jane@example.com"
+
+    stats = pool.stats()
+    assert stats['documents_parsed'] == 2
+    assert stats['documents_failed'] == 0
+    assert stats['workers_started'] == 1
+    assert stats['workers_alive'] == 1
+
+
+def test_recycles_after_max_documents(make_pool):
+    pool = make_pool(max_documents=2)
+    pool.parse(upload())
+    assert pool.stats()['recycled_max_documents'] == 0
+    pool.parse(upload())
+    assert pool.stats()['recycled_max_documents'] == 1
+
+    # Waits for the replacement worker
+    assert pool.parse(upload())['data']['name'] == "Jane Doe"
+    stats = pool.stats()
+    assert stats['workers_started'] == 2
+    assert stats['documents_parsed'] == 3
+    assert stats['peak_rss_mb'] > 0
+
+
+def test_recycles_over_rss_watermark(make_pool):
+    pool = make_pool(max_rss_mb=1)
+    pool.parse(upload())
+    pool.parse(upload())
+    stats = pool.stats()
+    assert stats['recycled_rss'] == 2
+    assert stats['recycled_max_documents'] == 0
+    assert stats['workers_started'] >= 2
+
+
+def test_kills_worker_over_time_limit(make_pool):
+    pool = make_pool(max_seconds=0.5, max_pages=100)
+    long_resume = [[f"line {i} of page {page} with some words" for i in range(50)] for page in range(40)]
+    with pytest.raises(DocumentLimitError) as e:
+        pool.parse(upload(long_resume))
+    assert e.value.limit == 'time'
+
+    stats = pool.stats()
+    assert stats['limit_rejections']['time'] == 1
+    assert stats['workers_killed'] == 1
+    assert stats['documents_failed'] == 1
+
+    # The replacement worker takes the next document
+    assert pool.parse(upload())['data']['name'] == "Jane Doe"
+    assert pool.stats()['workers_started'] == 2
+
+
+def test_page_limit_from_worker(make_pool):
+    pool = make_pool(max_pages=1)
+    with pytest.raises(DocumentLimitError) as e:
+        pool.parse(upload([RESUME, RESUME]))
+    assert (e.value.limit, e.value.value, e.value.maximum) == ('pages', 2, 1)
+
+    stats = pool.stats()
+    assert stats['limit_rejections'] == {'pages': 1, 'chars': 0, 'time': 0}
+    assert stats['documents_failed'] == 1
+    # A rejected document doesn't cost the worker
+    assert stats['workers_killed'] == 0
+    assert pool.parse(upload())['data']['name'] == "Jane Doe"
+    assert pool.stats()['workers_started'] == 1
+
+
+def test_worker_error(make_pool):
+    pool = make_pool()
+    broken = io.BytesIO(b"%PDF-1.4 not really")
+    broken.name = "broken.pdf"
+    with pytest.raises(WorkerError):
+        pool.parse(broken)
+    stats = pool.stats()
+    assert stats['documents_failed'] == 1
+    assert stats['workers_killed'] == 0
+    assert pool.parse(upload())['data']['name'] == "Jane Doe"
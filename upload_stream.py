@@ -0,0 +1,192 @@
+import io
+import logging
+
+from fastapi import HTTPException, Request
+
+try:
+    from python_multipart.exceptions import FormParserError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:
+    # python-multipart < 0.0.13 installs as "multipart"
+    from multipart.exceptions import FormParserError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+PDF_MAGIC = b"%PDF-"
+# Room for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 16 * 1024
+PARSE_SLICE = 64 * 1024
+
+
+class PdfUpload:
+    """A validated PDF upload held in an in-memory buffer"""
+
+    def __init__(self, filename, buffer):
+        self.filename = filename
+        self.buffer = buffer
+        with buffer.getbuffer() as view:
+            self.size = view.nbytes
+
+
+class _UploadCollector:
+    """Multipart callbacks that copy one file field into a bounded buffer.
+
+    Validation happens as bytes arrive: the part's content type is checked
+    once its headers are read, the PDF magic bytes once the first few
+    bytes are in, and the size on every chunk, so a bad upload is
+    rejected without reading the rest of the request. ``done`` is set once
+    the file part has ended, so the caller can stop reading there.
+    """
+
+    def __init__(self, field_name, max_size, allowed_content_types):
+        self.field_name = field_name
+        self.max_size = max_size
+        self.allowed_content_types = allowed_content_types
+        self.buffer = None
+        self.filename = None
+        self.found = False
+        self.done = False
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_file = False
+        self._checked_magic = False
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+
+    def on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, params = parse_options_header(self._headers.get(b"content-disposition"))
+        if params.get(b"name", b"").decode("latin-1") != self.field_name or self.found:
+            self._in_file = False
+            return
+
+        content_type, _ = parse_options_header(self._headers.get(b"content-type"))
+        content_type = content_type.decode("latin-1")
+        if content_type not in self.allowed_content_types:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid file type. Only PDF files are allowed. Got: {content_type}"
+            )
+
+        self.found = True
+        self._in_file = True
+        self.filename = params.get(b"filename", b"").decode("utf-8", "replace")
+        self.buffer = io.BytesIO()
+
+    def on_part_data(self, data, start, end):
+        if not self._in_file:
+            return
+        if self.buffer.tell() + (end - start) > self.max_size:
+            raise HTTPException(
+                status_code=400,
+                detail=f"File size too large. Maximum allowed size is {self.max_size // (1024*1024)}MB"
+            )
+        self.buffer.write(data[start:end])
+        if not self._checked_magic and self.buffer.tell() >= len(PDF_MAGIC):
+            self._check_magic()
+
+    def on_part_end(self):
+        if self._in_file:
+            if not self._checked_magic:
+                self._check_magic()
+            # Nothing after the file part is needed
+            self.done = True
+        self._in_file = False
+
+    def _check_magic(self):
+        self._checked_magic = True
+        with self.buffer.getbuffer() as view:
+            magic = bytes(view[:len(PDF_MAGIC)])
+        if magic != PDF_MAGIC:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid file content. The uploaded file is not a PDF"
+            )
+
+
+async def read_pdf_upload(request: Request, max_size: int, allowed_content_types,
+                          field_name: str = "file") -> PdfUpload:
+    """
+    Stream a multipart upload into memory, validating it while it is read
+
+    Args:
+        request: Incoming multipart/form-data request
+        max_size: Maximum file size in bytes
+        allowed_content_types: Content types accepted for the file part
+        field_name: Name of the form field holding the file
+
+    Returns:
+        PdfUpload with the filename and a buffer positioned at the start
+
+    Raises:
+        HTTPException: If the upload is missing, too large or not a PDF
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type"))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+    too_large = HTTPException(
+        status_code=400,
+        detail=f"File size too large. Maximum allowed size is {max_size // (1024*1024)}MB"
+    )
+    max_body = max_size + MULTIPART_OVERHEAD
+
+    # Reject on the declared length before reading any of the body
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_body:
+        raise too_large
+
+    collector = _UploadCollector(field_name, max_size, allowed_content_types)
+    parser = MultipartParser(boundary, collector.callbacks())
+    received = 0
+    try:
+        async for chunk in request.stream():
+            # Feed in slices so the limits don't depend on how the body was chunked
+            for start in range(0, len(chunk), PARSE_SLICE):
+                piece = chunk[start:start + PARSE_SLICE]
+                parser.write(piece)
+                if collector.done:
+                    break
+                # The declared length can be missing (chunked) or wrong, so count what arrives
+                received += len(piece)
+                if received > max_body:
+                    raise too_large
+            if collector.done:
+                break
+        else:
+            parser.finalize()
+    except FormParserError as e:
+        logger.warning(f"Malformed multipart upload: {e}")
+        raise HTTPException(status_code=400, detail="Malformed multipart upload")
+
+    if not collector.found:
+        raise HTTPException(status_code=400, detail=f"Missing file field '{field_name}'")
+
+    collector.buffer.seek(0)
+    collector.buffer.name = collector.filename
+    return PdfUpload(collector.filename, collector.buffer)
@@ -0,0 +1,332 @@
+import io
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import logging
+
+from modern_resume_parser import DocumentLimitError, record_cascade_tiers
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerError(Exception):
+    """Raised when a worker fails to parse a document"""
+
+
+def _current_rss_mb():
+    """Return this process's resident set size in MB, or None if unknown"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def _worker_main(conn, model, max_pages, max_chars, artifact_dir, update_db):
+    """Worker process loop: load spaCy once, then parse documents until told to stop"""
+    import spacy
+    from modern_resume_parser import ModernResumeParser
+    from artifact_store import ArtifactStore
+
+    nlp = spacy.load(model)
+    artifact_store = ArtifactStore(artifact_dir) if artifact_dir else None
+    conn.send(('ready', None, _current_rss_mb()))
+
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        pdf_file, layout, filename = task
+        if pdf_file is None:
+            # An in-memory upload follows as raw bytes
+            pdf_file = io.BytesIO(conn.recv_bytes())
+            pdf_file.name = filename
+        try:
+            parser = ModernResumeParser(pdf_file, layout=layout, nlp=nlp,
+                                        max_pages=max_pages, max_chars=max_chars,
+                                        artifact_store=artifact_store)
+            data = parser.get_extracted_data(update_db=update_db)
+            result = {'data': data, 'candidates': parser.candidates, 'tiers': parser.tiers}
+            # Don't keep the text and Docs alive until the next document
+            del parser
+            conn.send(('ok', result, _current_rss_mb()))
+        except DocumentLimitError as e:
+            conn.send(('limit', (e.limit, e.value, e.maximum), _current_rss_mb()))
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {e}", _current_rss_mb()))
+    conn.close()
+
+
+class _Worker:
+    """Handle for a single worker process"""
+
+    def __init__(self, ctx, model, max_pages, max_chars, artifact_dir, update_db):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main,
+                                   args=(child_conn, model, max_pages, max_chars,
+                                         artifact_dir, update_db),
+                                   daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.documents = 0
+        self.rss_mb = None
+
+    def wait_ready(self):
+        """Wait for the worker to load spaCy; raises WorkerError if it dies instead"""
+        try:
+            status, _, rss_mb = self.conn.recv()
+        except (EOFError, OSError) as e:
+            self.kill()
+            self.conn.close()
+            raise WorkerError(f"Worker process exited during startup: {e}")
+        self.rss_mb = rss_mb
+
+    def stop(self, timeout=5):
+        """Ask the worker to exit after its current document, kill it if it doesn't"""
+        try:
+            self.conn.send(None)
+        except (OSError, EOFError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+
+
+class WorkerPool:
+    """Pool of parser processes with recycling and per-document limits.
+
+    Each worker loads the spaCy model once and parses documents one at a
+    time. A worker is restarted after ``max_documents`` documents or when
+    its RSS goes over ``max_rss_mb``, so memory held by spaCy's string
+    store and pdfplumber doesn't build up. Documents with more than
+    ``max_pages`` pages or ``max_chars`` characters are rejected, and a
+    worker taking longer than ``max_seconds`` is killed and replaced.
+    With ``artifact_dir`` set, workers reuse cached parse intermediates
+    (see ``ArtifactStore``). ``model`` is the spaCy pipeline each worker
+    loads, and ``update_db`` whether workers store results in MySQL.
+
+    Replacement workers are started on a background thread, so the request
+    that triggers a restart gets its result without waiting for the new
+    worker to load spaCy. A request waits at most ``acquire_timeout``
+    seconds for a free worker.
+    """
+
+    # Attempts to start a replacement worker before giving up until the next request
+    SPAWN_ATTEMPTS = 3
+
+    def __init__(self, workers=1, max_documents=500, max_rss_mb=1024,
+                 max_pages=20, max_chars=200000, max_seconds=60, artifact_dir=None,
+                 acquire_timeout=None, model='en_core_web_sm', update_db=True):
+        self.workers = workers
+        self.model = model
+        self.update_db = update_db
+        self.max_documents = max_documents
+        self.max_rss_mb = max_rss_mb
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.max_seconds = max_seconds
+        self.artifact_dir = artifact_dir
+        self.acquire_timeout = acquire_timeout if acquire_timeout is not None else max_seconds * 2
+        self._alive = 0
+        self._pending = 0
+        self._closed = False
+        self._ctx = multiprocessing.get_context('spawn')
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = {
+            'workers': workers,
+            'documents_parsed': 0,
+            'documents_failed': 0,
+            'limit_rejections': {'pages': 0, 'chars': 0, 'time': 0},
+            'recycled_max_documents': 0,
+            'recycled_rss': 0,
+            'workers_killed': 0,
+            'workers_started': 0,
+            'spawn_failures': 0,
+            'peak_rss_mb': 0,
+        }
+        for _ in range(workers):
+            self._idle.put(self._start_worker())
+
+    def _start_worker(self):
+        worker = _Worker(self._ctx, self.model, self.max_pages, self.max_chars,
+                         self.artifact_dir, self.update_db)
+        worker.wait_ready()
+        with self._lock:
+            self._stats['workers_started'] += 1
+            self._alive += 1
+        return worker
+
+    def _respawn(self, retired=None, graceful=True):
+        """Retire a worker and start its replacement; runs on a background thread"""
+        if retired is not None:
+            if graceful:
+                retired.stop()
+            else:
+                retired.kill()
+                retired.conn.close()
+
+        delay = 1
+        try:
+            for attempt in range(1, self.SPAWN_ATTEMPTS + 1):
+                if self._closed:
+                    return
+                try:
+                    worker = self._start_worker()
+                except Exception as e:
+                    self._record('spawn_failures')
+                    logger.error(f"Could not start parser worker (attempt {attempt}): {e}")
+                    time.sleep(delay)
+                    delay *= 2
+                    continue
+                if self._closed:
+                    worker.stop()
+                else:
+                    self._idle.put(worker)
+                return
+            logger.error("Giving up on starting a parser worker until the next request")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _spawn_async(self, retired=None, graceful=True):
+        """Take a worker out of service and replace it without blocking the caller"""
+        with self._lock:
+            if retired is not None:
+                self._alive -= 1
+            self._pending += 1
+        threading.Thread(target=self._respawn, args=(retired, graceful), daemon=True).start()
+
+    def _top_up(self):
+        """Start workers for any that were lost and not successfully replaced"""
+        with self._lock:
+            missing = self.workers - self._alive - self._pending
+        for _ in range(max(missing, 0)):
+            self._spawn_async()
+
+    def _record(self, key, limit=None):
+        with self._lock:
+            if limit:
+                self._stats['limit_rejections'][limit] += 1
+            if key:
+                self._stats[key] += 1
+
+    def _replace(self, worker):
+        """Kill a stuck or dead worker and put a fresh one in the pool"""
+        self._record('workers_killed')
+        self._spawn_async(worker, graceful=False)
+
+    def _release(self, worker):
+        """Return a worker to the pool, recycling it if it is past a watermark"""
+        reason = None
+        if self.max_documents and worker.documents >= self.max_documents:
+            reason = 'recycled_max_documents'
+        elif self.max_rss_mb and worker.rss_mb and worker.rss_mb > self.max_rss_mb:
+            reason = 'recycled_rss'
+
+        if reason:
+            logger.info(f"Recycling worker {worker.process.pid} "
+                        f"({worker.documents} documents, {worker.rss_mb or 0:.0f} MB RSS)")
+            self._record(reason)
+            self._spawn_async(worker)
+            return
+        self._idle.put(worker)
+
+    def parse(self, pdf_file, layout=False):
+        """Parse a PDF path or in-memory buffer in a worker process.
+
+        Returns:
+            Dict with the extracted ``data``, ranked ``candidates`` per field
+            and the cascade ``tiers`` that ran
+
+        Raises:
+            DocumentLimitError: If the document exceeds a page, character or time limit
+            WorkerError: If parsing fails inside the worker
+        """
+        in_memory = hasattr(pdf_file, 'getbuffer')
+        if in_memory:
+            # Uploads are sent as raw bytes after the task so they never touch the disk
+            task = (None, layout, getattr(pdf_file, 'name', None))
+        else:
+            task = (os.path.abspath(pdf_file), layout, None)
+
+        self._top_up()
+        try:
+            worker = self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise WorkerError(f"No parser worker became available within {self.acquire_timeout}s")
+        try:
+            worker.conn.send(task)
+            if in_memory:
+                # Send straight from the buffer instead of copying it first
+                with pdf_file.getbuffer() as view:
+                    worker.conn.send_bytes(view)
+            if not worker.conn.poll(self.max_seconds):
+                logger.warning(f"Killing worker {worker.process.pid} after {self.max_seconds}s")
+                self._replace(worker)
+                self._record('documents_failed', limit='time')
+                raise DocumentLimitError('time', f"{self.max_seconds}+", self.max_seconds)
+            status, payload, rss_mb = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            # Worker died mid-document (e.g. OOM-killed)
+            self._replace(worker)
+            self._record('documents_failed')
+            raise WorkerError(f"Worker process died: {e}")
+
+        worker.documents += 1
+        worker.rss_mb = rss_mb
+        with self._lock:
+            if rss_mb:
+                self._stats['peak_rss_mb'] = max(self._stats['peak_rss_mb'], round(rss_mb, 1))
+        self._release(worker)
+
+        if status == 'ok':
+            self._record('documents_parsed')
+            # Keep cascade stats in this process, where /stats can read them
+            record_cascade_tiers(payload['tiers'])
+            return payload
+        if status == 'limit':
+            self._record('documents_failed', limit=payload[0])
+            raise DocumentLimitError(*payload)
+        self._record('documents_failed')
+        raise WorkerError(payload)
+
+    def stats(self):
+        """Return counters for parsed documents, limit hits and worker restarts"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['limit_rejections'] = dict(self._stats['limit_rejections'])
+            stats['workers_alive'] = self._alive
+            stats['workers_starting'] = self._pending
+        stats['idle_workers'] = self._idle.qsize()
+        stats['limits'] = {
+            'max_documents': self.max_documents,
+            'max_rss_mb': self.max_rss_mb,
+            'max_pages': self.max_pages,
+            'max_chars': self.max_chars,
+            'max_seconds': self.max_seconds,
+        }
+        return stats
+
+    def close(self):
+        """Stop all idle workers; workers still starting stop themselves"""
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.stop()